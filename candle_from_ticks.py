@@ -3,8 +3,11 @@ from datetime import timedelta
 from zoneinfo import ZoneInfo
 
 import mplfinance as mpf
+import numpy as np
 import pandas as pd
 
+from live_trend_analyzer import resample_ohlcv
+
 # CONFIG
 DB_PATH = "market_data.db"
 TOKEN = "17939"
@@ -25,20 +28,15 @@ last_ts = conn.execute(
 if last_ts is None:
     raise ValueError(f"No tick data found for token {TOKEN}")
 
-# Detect if timestamps are in milliseconds
-use_millis = last_ts > 1e12
-last_ts_seconds = last_ts // 1000 if use_millis else last_ts
+# exchange_timestamp is stored in epoch milliseconds
+last_ts_seconds = last_ts // 1000
 
 # Calculate start and end times
 end_time = pd.to_datetime(last_ts_seconds, unit="s").tz_localize("UTC").tz_convert(IST)
 start_time = end_time - timedelta(minutes=TIMEFRAME_MINUTES * NUM_CANDLES)
 
-start_ts = (
-    int(start_time.timestamp() * 1000) if use_millis else int(start_time.timestamp())
-)
-end_ts_db = (
-    int(end_time.timestamp() * 1000) if use_millis else int(end_time.timestamp())
-)
+start_ts = int(start_time.timestamp() * 1000)
+end_ts_db = int(end_time.timestamp() * 1000)
 
 # Fetch tick data
 query = """
@@ -48,32 +46,39 @@ WHERE token = ?
   AND exchange_timestamp BETWEEN ? AND ?
 ORDER BY exchange_timestamp
 """
-df = pd.read_sql(query, conn, params=(TOKEN, start_ts, end_ts_db))
+rows = conn.execute(query, (TOKEN, start_ts, end_ts_db)).fetchall()
 conn.close()
 
-if df.empty:
+if not rows:
     raise ValueError("No ticks found in the requested time range.")
 
-# Convert timestamp to datetime in IST
-if use_millis:
-    df["exchange_timestamp"] = df["exchange_timestamp"] // 1000
-df["datetime"] = (
-    pd.to_datetime(df["exchange_timestamp"], unit="s")
-    .dt.tz_localize("UTC")
-    .dt.tz_convert(IST)
+ticks = np.array(rows, dtype=np.float64)
+ts_seconds = ticks[:, 0].astype(np.int64) // 1000
+
+# Resample ticks → candles on IST wall-clock time, counting buckets from
+# IST midnight of the first tick (pandas' default origin="start_day"), so
+# timeframes that don't divide a day still line up with resample()
+ist_offset = int(end_time.utcoffset().total_seconds())
+local_seconds = ts_seconds + ist_offset
+day_start = int(local_seconds[0]) // 86_400 * 86_400
+ltp = ticks[:, 1]
+ohlcv = resample_ohlcv(
+    (local_seconds - day_start) * 1_000_000_000,
+    TIMEFRAME_MINUTES * 60 * 1_000_000_000,
+    ltp, ltp, ltp, ltp, ticks[:, 2],
 )
-df.set_index("datetime", inplace=True)
-
-# Ensure chronological order
-df.sort_index(inplace=True)
-
-# Resample ticks → candles
-timeframe_str = f"{TIMEFRAME_MINUTES}min"
-candles = df.resample(timeframe_str).agg(
-    {"ltp": ["first", "max", "min", "last"], "volume": "sum"}
+candles = pd.DataFrame(
+    {
+        "Open": ohlcv["open"],
+        "High": ohlcv["high"],
+        "Low": ohlcv["low"],
+        "Close": ohlcv["close"],
+        "Volume": ohlcv["volume"],
+    },
+    index=pd.DatetimeIndex(ohlcv["timestamp"] + np.timedelta64(day_start - ist_offset, "s"))
+    .tz_localize("UTC")
+    .tz_convert(IST),
 )
-candles.columns = ["Open", "High", "Low", "Close", "Volume"]
-candles.dropna(inplace=True)
 
 # Keep only the latest NUM_CANDLES
 candles = candles.tail(NUM_CANDLES)
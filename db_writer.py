@@ -1,78 +1,153 @@
+import atexit
+import queue
 import sqlite3
+import threading
 import time
-from threading import Lock
+from operator import itemgetter
 
 DB_FILE = "market_data.db"
-_lock = Lock()
+BATCH_ROWS = 500  # max rows per write transaction
+QUEUE_SIZE = 100_000
+MAINTENANCE_INTERVAL = 60  # seconds between PRAGMA optimize runs
+WRITE_RETRIES = 5  # attempts on "database is locked" before going row-by-row
+_write_q = queue.Queue(maxsize=QUEUE_SIZE)
+
+INSERT_SQL = """
+    INSERT OR IGNORE INTO market_ticks (
+        token, exchange_type, subscription_mode,
+        sequence_number, exchange_timestamp, exchange_timestamp_human,
+        ltp,
+
+        last_traded_qty, avg_traded_price, volume,
+        total_buy_qty, total_sell_qty,
+
+        open, high, low, close,
+
+        last_traded_time, open_interest, oi_change_percent,
+
+        upper_circuit, lower_circuit, week_52_high, week_52_low,
+
+        received_at
+    )
+    VALUES (
+        ?, ?, ?, ?, ?, ?, ?,
+        ?, ?, ?, ?, ?,
+        ?, ?, ?, ?,
+        ?, ?, ?,
+        ?, ?, ?, ?,
+        ?
+    )
+"""
 
 def get_connection():
     conn = sqlite3.connect(DB_FILE, check_same_thread=False)
     conn.execute("PRAGMA journal_mode=WAL;")
     conn.execute("PRAGMA synchronous=NORMAL;")
+    conn.execute("PRAGMA cache_size=-65536;")  # 64 MB page cache
+    conn.execute("PRAGMA mmap_size=268435456;")
+    conn.execute("PRAGMA temp_store=MEMORY;")
+    # Per-connection setting: checkpoint every 10000 WAL pages (~40 MB at
+    # 4 KB pages, ~80 MB at 8 KB) instead of every 1000, so bursts are not
+    # stalled by checkpoints
+    conn.execute("PRAGMA wal_autocheckpoint=10000;")
     return conn
 
 _conn = get_connection()
 _cur = _conn.cursor()
 
+# Column order of INSERT_SQL, minus the trailing received_at
+TICK_FIELDS = (
+    "token", "exchange_type", "subscription_mode",
+    "sequence_number", "exchange_timestamp", "exchange_timestamp_human",
+    "ltp",
+    "last_traded_qty", "avg_traded_price", "volume",
+    "total_buy_qty", "total_sell_qty",
+    "open", "high", "low", "close",
+    "last_traded_time", "open_interest", "oi_change_percent",
+    "upper_circuit", "lower_circuit", "week_52_high", "week_52_low",
+)
+_TICK_DEFAULTS = dict.fromkeys(TICK_FIELDS)
+_get_tick_fields = itemgetter(*TICK_FIELDS)
+
+def _tick_row(data: dict) -> tuple:
+    try:
+        values = _get_tick_fields(data)
+    except KeyError:
+        # LTP/QUOTE packets lack the later fields; store them as NULL
+        values = _get_tick_fields({**_TICK_DEFAULTS, **data})
+    return values + (time.time_ns() // 1_000_000,)
+
+def _write_batch(batch):
+    """Write a batch in one transaction; never lose more than the bad rows"""
+    for attempt in range(WRITE_RETRIES):
+        try:
+            _cur.execute("BEGIN IMMEDIATE")
+            _cur.executemany(INSERT_SQL, batch)
+            _conn.commit()
+            return
+        except sqlite3.OperationalError as e:
+            _conn.rollback()
+            # Another connection holds the lock: back off and retry the batch
+            print("DB write retry:", e)
+            time.sleep(0.1 * (attempt + 1))
+        except Exception as e:
+            _conn.rollback()
+            print("DB batch write error, retrying row by row:", e)
+            break
+
+    # Isolate the offending tick(s) so the rest of the batch still lands
+    for row in batch:
+        try:
+            _cur.execute(INSERT_SQL, row)
+            _conn.commit()
+        except Exception as e:
+            _conn.rollback()
+            print("DB write error:", e)
+
+def _writer():
+    """Drain the queue and write whatever is waiting in one transaction"""
+    last_maintenance = time.monotonic()
+    while True:
+        batch = [_write_q.get()]
+        while len(batch) < BATCH_ROWS:
+            try:
+                batch.append(_write_q.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _write_batch(batch)
+        except Exception as e:
+            # Keep the thread alive: a dead writer would hang every flush
+            print("DB writer error:", e)
+        finally:
+            for _ in batch:
+                _write_q.task_done()
+
+        if time.monotonic() - last_maintenance >= MAINTENANCE_INTERVAL:
+            last_maintenance = time.monotonic()
+            try:
+                _cur.execute("PRAGMA optimize;")
+            except Exception as e:
+                print("DB maintenance error:", e)
+
 def insert_market_tick(data: dict):
-    with _lock:
-        _cur.execute("""
-            INSERT OR IGNORE INTO market_ticks (
-                token, exchange_type, subscription_mode,
-                sequence_number, exchange_timestamp, exchange_timestamp_human,
-                ltp,
-
-                last_traded_qty, avg_traded_price, volume,
-                total_buy_qty, total_sell_qty,
-
-                open, high, low, close,
-
-                last_traded_time, open_interest, oi_change_percent,
-
-                upper_circuit, lower_circuit, week_52_high, week_52_low,
-
-                received_at
-            )
-            VALUES (
-                ?, ?, ?, ?, ?, ?, ?,
-                ?, ?, ?, ?, ?,
-                ?, ?, ?, ?,
-                ?, ?, ?,
-                ?, ?, ?, ?,
-                ?
-            )
-        """, (
-            data.get("token"),
-            data.get("exchange_type"),
-            data.get("subscription_mode"),
-
-            data.get("sequence_number"),
-            data.get("exchange_timestamp"),
-            data.get("exchange_timestamp_human"),
-
-            data.get("ltp"),
-
-            data.get("last_traded_qty"),
-            data.get("avg_traded_price"),
-            data.get("volume"),
-            data.get("total_buy_qty"),
-            data.get("total_sell_qty"),
-
-            data.get("open"),
-            data.get("high"),
-            data.get("low"),
-            data.get("close"),
-
-            data.get("last_traded_time"),
-            data.get("open_interest"),
-            data.get("oi_change_percent"),
-
-            data.get("upper_circuit"),
-            data.get("lower_circuit"),
-            data.get("week_52_high"),
-            data.get("week_52_low"),
-
-            int(time.time() * 1000)
-        ))
-
-        _conn.commit()
+    """Queue a parsed tick for the writer thread; never blocks the socket"""
+    try:
+        _write_q.put_nowait(_tick_row(data))
+    except queue.Full:
+        # Writer is QUEUE_SIZE rows behind: drop this tick rather than
+        # stall the WebSocket read loop
+        print(f"DB write queue full, dropped tick for token {data.get('token')}")
+
+def bulk_insert_ticks(ticks):
+    """Queue many parsed ticks and wait until they are written"""
+    for data in ticks:
+        _write_q.put(_tick_row(data))
+    flush_ticks()
+
+def flush_ticks():
+    """Block until every queued tick has been written"""
+    _write_q.join()
+
+threading.Thread(target=_writer, name="db-writer", daemon=True).start()
+atexit.register(flush_ticks)
@@ -3,17 +3,31 @@ import sqlite3
 conn = sqlite3.connect("market_data.db")
 cur = conn.cursor()
 
+# Page size is fixed when the file is created (and cannot change once the
+# DB is in WAL mode); existing databases are only re-paged by the VACUUM
+# that follows a legacy migration below.
+cur.execute("PRAGMA page_size=8192;")
+
+# ---------------- MIGRATION ----------------
+# Databases created before the WITHOUT ROWID layout still have the
+# AUTOINCREMENT id column plus two duplicate (token, exchange_timestamp)
+# indexes; CREATE TABLE IF NOT EXISTS would silently keep them
+legacy = "id" in {row[1] for row in cur.execute("PRAGMA table_info(market_ticks)")}
+if legacy:
+    print("Migrating market_ticks to the WITHOUT ROWID layout...")
+    cur.execute("BEGIN")
+    # Old indexes move with the table and are dropped along with it
+    cur.execute("ALTER TABLE market_ticks RENAME TO market_ticks_legacy;")
+
 # ---------------- TABLE ----------------
 cur.execute("""
 CREATE TABLE IF NOT EXISTS market_ticks (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-
     token TEXT,
     exchange_type INTEGER,
     subscription_mode INTEGER,
 
     sequence_number INTEGER,
-    exchange_timestamp INTEGER,
+    exchange_timestamp INTEGER,  -- epoch milliseconds
     exchange_timestamp_human TEXT,
 
     ltp REAL,
@@ -38,23 +52,50 @@ CREATE TABLE IF NOT EXISTS market_ticks (
     week_52_high REAL,
     week_52_low REAL,
 
-    received_at INTEGER
-);
+    received_at INTEGER,
+
+    -- 🔒 CRITICAL: the natural key prevents duplicate ticks
+    PRIMARY KEY (token, exchange_timestamp)
+) WITHOUT ROWID;
 """)
 
+if legacy:
+    columns = ", ".join(row[1] for row in cur.execute("PRAGMA table_info(market_ticks)"))
+    cur.execute(f"""
+    INSERT OR IGNORE INTO market_ticks ({columns})
+    SELECT {columns} FROM market_ticks_legacy ORDER BY id;
+    """)
+    copied = cur.rowcount
+    total = cur.execute("SELECT COUNT(*) FROM market_ticks_legacy").fetchone()[0]
+    cur.execute("DROP TABLE market_ticks_legacy;")
+    conn.commit()
+    # Rows without a token/exchange_timestamp (or repeats of one) have no
+    # place under the natural key
+    print(f"Migrated {copied} of {total} ticks ({total - copied} skipped)")
+
 # ---------------- INDEXES ----------------
-# For fast queries
-cur.execute("""
-CREATE INDEX IF NOT EXISTS idx_token_ts
-ON market_ticks (token, exchange_timestamp);
-""")
+# (token, exchange_timestamp) lookups are served by the primary key
 
-# 🔒 CRITICAL: prevent duplicate ticks
+# Live analyzer reads today's session by arrival time; the trailing
+# columns make this a covering index for that SELECT (at the cost of a
+# larger DB file), so rows never have to be looked up in the table
 cur.execute("""
-CREATE UNIQUE INDEX IF NOT EXISTS uniq_token_exchange_ts
-ON market_ticks (token, exchange_timestamp);
+CREATE INDEX IF NOT EXISTS idx_token_received_cover
+ON market_ticks (
+    token, received_at,
+    exchange_timestamp, ltp, last_traded_qty, volume,
+    open, high, low, close
+);
 """)
 
+# Reclaim the legacy table's pages (otherwise left on the freelist) and
+# re-page the file at 8 KB; page_size only changes on VACUUM outside WAL
+if legacy:
+    print("Compacting the migrated database...")
+    cur.execute("PRAGMA journal_mode=DELETE;")
+    cur.execute("PRAGMA page_size=8192;")
+    cur.execute("VACUUM;")
+
 # ---------------- PERFORMANCE ----------------
 cur.execute("PRAGMA journal_mode=WAL;")
 cur.execute("PRAGMA synchronous=NORMAL;")
@@ -16,27 +16,37 @@ USAGE:
 """
 
 import sqlite3
-from datetime import datetime, time as datetime_time
+from collections import OrderedDict
+from datetime import datetime, time as datetime_time, timedelta, timezone
+from itertools import groupby
+from operator import itemgetter
 from zoneinfo import ZoneInfo
-import pandas as pd
 import numpy as np
 
 
+IST = ZoneInfo("Asia/Kolkata")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 #                     HELPER FUNCTIONS
 # ═══════════════════════════════════════════════════════════════════════
 
 def to_raw_numbers(d):
     """Convert numpy types to native Python numbers"""
-    raw = {}
-    for k, v in d.items():
-        if isinstance(v, (np.integer,)):
-            raw[k] = int(v)
-        elif isinstance(v, (np.floating,)):
-            raw[k] = float(v)
-        else:
-            raw[k] = v
-    return raw
+    # np.generic.item() returns the matching Python scalar in one C call
+    return {k: v.item() if isinstance(v, np.generic) else v for k, v in d.items()}
+
+
+def as_int_array(values):
+    """Whole-number float array (no NaN) -> int32 when it fits, else int64"""
+    fits_int32 = len(values) == 0 or np.abs(values).max() < 2**31
+    return values.astype(np.int32 if fits_int32 else np.int64)
+
+
+def ns_to_ist_iso(ns):
+    """Epoch nanoseconds -> ISO 8601 string in IST (exact to the microsecond)"""
+    return (EPOCH + timedelta(microseconds=int(ns) // 1000)).astimezone(IST).isoformat()
 
 
 def is_market_hours():
@@ -63,6 +73,105 @@ def get_current_timestamp():
 #                  TECHNICAL INDICATORS CALCULATION
 # ═══════════════════════════════════════════════════════════════════════
 
+def wilder_rsi(close, period=14):
+    """
+    Latest RSI using Wilder's smoothing in a single pass over the closes
+
+    The first average is the simple mean of the first `period` gains/losses,
+    then avg = (avg * (period - 1) + current) / period.
+    Returns NaN until `period` deltas exist.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if len(close) <= period:
+        return np.nan
+
+    delta = np.diff(close)
+    gains = np.clip(delta, 0, None).tolist()
+    losses = np.clip(-delta, 0, None).tolist()
+
+    avg_gain = sum(gains[:period]) / period
+    avg_loss = sum(losses[:period]) / period
+    keep = period - 1
+    for gain, loss in zip(gains[period:], losses[period:]):
+        avg_gain = (avg_gain * keep + gain) / period
+        avg_loss = (avg_loss * keep + loss) / period
+
+    if avg_loss == 0:
+        return 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def calculate_ema(values, span):
+    """
+    EMA with the same recurrence as pandas ewm(span=span, adjust=False):
+    y[0] = x[0], y[i] = alpha * x[i] + (1 - alpha) * y[i-1]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty_like(values)
+    if len(values) == 0:
+        return out
+
+    alpha = 2.0 / (span + 1.0)
+    decay = 1.0 - alpha
+    prev = out[0] = values[0]
+    for i, x in enumerate(values[1:].tolist(), 1):
+        prev = alpha * x + decay * prev
+        out[i] = prev
+
+    return out
+
+
+def resample_ohlcv(ts, interval, open_, high, low, close, volume):
+    """
+    Bucket time-sorted ticks into fixed-interval OHLCV candles
+
+    `ts` is an int64 array (ns) and `interval` the bucket width in the same
+    unit. One np.*.reduceat pass per column over contiguous group slices;
+    matches resample().agg(first/max/min/last/sum).dropna(): NaNs are
+    skipped within a bucket and buckets with a missing field are dropped.
+    """
+    n = len(ts)
+    if n == 0:
+        empty = np.empty(0)
+        return {"timestamp": np.empty(0, dtype="datetime64[ns]"), "open": empty,
+                "high": empty, "low": empty, "close": empty, "volume": empty}
+
+    bucket = ts // interval
+    starts = np.flatnonzero(np.diff(bucket, prepend=bucket[0] - 1))
+    ends = np.r_[starts[1:], n] - 1
+    idx = np.arange(n)
+
+    def first(x):
+        pos = np.minimum.reduceat(np.where(np.isnan(x), n, idx), starts)
+        return np.where(pos <= ends, x[np.minimum(pos, n - 1)], np.nan)
+
+    def last(x):
+        pos = np.maximum.reduceat(np.where(np.isnan(x), -1, idx), starts)
+        return np.where(pos >= starts, x[pos], np.nan)
+
+    candles = {
+        "timestamp": (bucket[starts] * interval).view("datetime64[ns]"),
+        "open": first(open_),
+        "high": np.fmax.reduceat(high, starts),
+        "low": np.fmin.reduceat(low, starts),
+        "close": last(close),
+        "volume": np.add.reduceat(np.nan_to_num(volume), starts),
+    }
+
+    complete = ~(
+        np.isnan(candles["open"]) | np.isnan(candles["high"])
+        | np.isnan(candles["low"]) | np.isnan(candles["close"])
+    )
+    if not complete.all():
+        candles = {k: v[complete] for k, v in candles.items()}
+    return candles
+
+
+NS_PER_DAY = 86_400 * 1_000_000_000
+IST_OFFSET_NS = (5 * 3600 + 30 * 60) * 1_000_000_000  # IST is UTC+05:30, no DST
+SESSION_OPEN_NS = (9 * 3600 + 15 * 60) * 1_000_000_000  # 09:15 IST
+
+
 def calculate_intraday_indicators(raw_data):
     """
     Calculate technical indicators for intraday trading
@@ -74,70 +183,94 @@ def calculate_intraday_indicators(raw_data):
     4. EMA 20 & 50 (needs 50+ 5m candles)
     5. RSI (needs 15+ 5m candles)
     
+    raw_data: mapping of column name -> 1-D array (e.g. the dict returned
+    by fetch_today_live_data, or a DataFrame)
+    
     Returns: Dictionary with available indicators and bullish score
     """
-    df = pd.DataFrame(raw_data)
+    num_cols = ['ltp', 'last_traded_qty', 'volume', 'open', 'high', 'low', 'close']
 
     # ================== VALIDATION ==================
-    if df.empty or len(df) < 10:
+    rows = len(raw_data['exchange_timestamp'])
+    if rows < 10:
         return {
             "error": "Not enough raw data",
-            "rows_available": len(df)
+            "rows_available": rows
         }
 
     # ================== TIMESTAMP NORMALIZATION ==================
-    ts = pd.to_numeric(df['exchange_timestamp'], errors='coerce').dropna()
-    if ts.empty:
+    ts = np.asarray(raw_data['exchange_timestamp'], dtype=np.float64)
+    # Anything outside the int64-nanosecond range is corrupt (or not epoch
+    # milliseconds) and would wrap around when scaled; drop it like NaT
+    valid_ts = np.isfinite(ts) & (ts >= 0) & (ts < 2**63 // 1_000_000)
+    if not valid_ts.any():
         return {"error": "Invalid exchange_timestamp data"}
 
-    max_ts = ts.max()
-    if max_ts > 10**18:
-        df['timestamp'] = pd.to_datetime(df['exchange_timestamp'], unit='ns', errors='coerce')
-    elif max_ts > 10**15:
-        df['timestamp'] = pd.to_datetime(df['exchange_timestamp'], unit='us', errors='coerce')
-    elif max_ts > 10**12:
-        df['timestamp'] = pd.to_datetime(df['exchange_timestamp'], unit='ms', errors='coerce')
-    else:
-        df['timestamp'] = pd.to_datetime(df['exchange_timestamp'], unit='s', errors='coerce')
+    # exchange_timestamp is stored in epoch milliseconds (see parse_response);
+    # scale to nanoseconds with one integer multiply (no datetime parsing)
+    ts_ns = ts[valid_ts].astype(np.int64) * 1_000_000
 
-    df = df.dropna(subset=['timestamp'])
-    df = df.sort_values('timestamp').reset_index(drop=True)
+    # One float64 array per column (SoA)
+    cols = {c: np.asarray(raw_data[c], dtype=np.float64) for c in num_cols}
+    if not valid_ts.all():
+        cols = {c: v[valid_ts] for c, v in cols.items()}
 
-    if len(df) < 10:
+    # Rows arrive ordered by received_at, which almost always means exchange
+    # time is already monotonic - only sort when it isn't. A stable sort keeps
+    # arrival order for ticks sharing the same exchange timestamp.
+    if (np.diff(ts_ns) < 0).any():
+        order = np.argsort(ts_ns, kind='stable')
+        ts_ns = ts_ns[order]
+        cols = {c: v[order] for c, v in cols.items()}
+
+    if len(ts_ns) < 10:
         return {"error": "Not enough rows after timestamp normalization"}
 
     # ================== NUMERIC CLEANUP ==================
-    num_cols = ['ltp', 'last_traded_qty', 'volume', 'open', 'high', 'low', 'close']
-    df[num_cols] = df[num_cols].apply(pd.to_numeric, errors='coerce')
-    df = df.dropna(subset=['ltp', 'last_traded_qty', 'volume'])
+    valid = ~(
+        np.isnan(cols['ltp']) | np.isnan(cols['last_traded_qty']) | np.isnan(cols['volume'])
+    )
+    if not valid.all():
+        ts_ns = ts_ns[valid]
+        cols = {c: v[valid] for c, v in cols.items()}
 
-    if len(df) < 10:
+    if len(ts_ns) < 10:
         return {"error": "Not enough valid rows after cleanup"}
 
+    ltp = cols['ltp']
+    close = cols['close']
+
+    # Quantities are whole numbers: hold them in the narrowest integer dtype
+    # (exact diffs/sums, and int32 halves the bytes of the two busiest columns)
+    qty = as_int_array(cols['last_traded_qty'])
+    cum_volume = as_int_array(cols['volume'])
+
     # Fix cumulative volume
-    df['volume'] = df['volume'].diff().fillna(0).clip(lower=0)
+    volume = np.clip(np.diff(cum_volume, prepend=cum_volume[0]), 0, None)
 
     # Track which indicators are available
     available_indicators = []
     skipped_indicators = []
 
     # ================== 1. VOLUME & VALUE ANALYSIS (ALWAYS) ==================
-    df['trade_value'] = df['last_traded_qty'] * df['ltp']
+    trade_value = qty * ltp
     
-    # Get latest row AFTER creating all needed columns
-    latest = df.iloc[-1]
-    prev_close = df['close'].iloc[-2] if len(df) > 1 else latest['ltp']
-    vol_roll = df['volume'].rolling(20).mean().dropna()
-    val_roll = df['trade_value'].rolling(20).mean().dropna()
+    # Bind the latest tick's values once
+    last_ltp = ltp[-1]
+    last_volume = volume[-1]
+    last_value = trade_value[-1]
+    prev_close = close[-2] if len(close) > 1 else last_ltp
 
-    avg_volume = vol_roll.iloc[-1] if not vol_roll.empty else df['volume'].mean()
-    avg_value = val_roll.iloc[-1] if not val_roll.empty else df['trade_value'].mean()
+    # Mean of the last 20 ticks (all ticks when fewer) - only the latest
+    # window is needed, so skip building the full rolling(20) series
+    avg_volume = volume[-20:].mean()
+    avg_value = trade_value[-20:].mean()
 
-    if latest['volume'] > avg_volume and latest['trade_value'] > avg_value:
+    if last_volume > avg_volume and last_value > avg_value:
         volume_value_signal = "HIGH_VOLUME_HIGH_VALUE"
-    elif latest['volume'] > avg_volume and latest['trade_value'] < avg_value:
+    elif last_volume > avg_volume and last_value < avg_value:
         volume_value_signal = "HIGH_VOLUME_LOW_VALUE"
-    elif latest['ltp'] > prev_close and latest['volume'] < avg_volume:
+    elif last_ltp > prev_close and last_volume < avg_volume:
         volume_value_signal = "PRICE_UP_LOW_VOLUME"
     else:
         volume_value_signal = "NEUTRAL"
@@ -145,29 +278,36 @@ def calculate_intraday_indicators(raw_data):
     available_indicators.append("Volume & Value")
 
     # ================== 2. VWAP (ALWAYS) ==================
-    df['pv'] = df['ltp'] * df['last_traded_qty']
-    df['cum_pv'] = df['pv'].cumsum()
-    df['cum_qty'] = df['last_traded_qty'].cumsum()
+    # Only the session-wide VWAP is used, so keep the sums as locals
+    cum_qty = qty.sum()
 
-    if df['cum_qty'].iloc[-1] == 0:
+    if cum_qty == 0:
         return {"error": "VWAP quantity is zero"}
 
-    df['vwap'] = df['cum_pv'] / df['cum_qty']
-    vwap = df['vwap'].iloc[-1]
-    vwap_signal = "PRICE_ABOVE_VWAP" if latest['ltp'] > vwap else "PRICE_BELOW_VWAP"
+    # trade_value is the per-tick price * quantity product VWAP needs
+    vwap = trade_value.sum() / cum_qty
+    vwap_signal = "PRICE_ABOVE_VWAP" if last_ltp > vwap else "PRICE_BELOW_VWAP"
     
     available_indicators.append("VWAP")
 
     # ================== 5-MIN CANDLES ==================
-    df_5m = df.resample(
-        '5min', on='timestamp'
-    ).agg({
-        'open': 'first',
-        'high': 'max',
-        'low': 'min',
-        'close': 'last',
-        'volume': 'sum'
-    }).dropna()
+    # Build candles from the latest tick's session only: a stray zero or
+    # pre-market exchange timestamp would otherwise become a candle of its own
+    session_start_ns = (
+        (ts_ns[-1] + IST_OFFSET_NS) // NS_PER_DAY * NS_PER_DAY
+        - IST_OFFSET_NS + SESSION_OPEN_NS
+    )
+    first = np.searchsorted(ts_ns, session_start_ns) if ts_ns[-1] >= session_start_ns else 0
+    candles_5m = resample_ohlcv(
+        ts_ns[first:],
+        5 * 60 * 1_000_000_000,
+        cols['open'][first:],
+        cols['high'][first:],
+        cols['low'][first:],
+        close[first:],
+        volume[first:],
+    )
+    n_5m = len(candles_5m['close'])
 
     # Initialize optional indicators as None
     market_structure = None
@@ -178,56 +318,45 @@ def calculate_intraday_indicators(raw_data):
     rsi_signal = None
 
     # ================== 3. MARKET STRUCTURE (needs 2+ candles) ==================
-    if len(df_5m) >= 2:
-        prev = df_5m.iloc[-2]
-        curr = df_5m.iloc[-1]
+    if n_5m >= 2:
+        # Compare the last two candles straight off the arrays
+        # (a row lookup would build a mixed-dtype Series each time)
+        prev_h, curr_h = candles_5m['high'][-2:]
+        prev_l, curr_l = candles_5m['low'][-2:]
         
         market_structure = (
             "BULLISH_HH_HL"
-            if curr['high'] > prev['high'] and curr['low'] > prev['low']
+            if curr_h > prev_h and curr_l > prev_l
             else "NOT_BULLISH"
         )
-        prev_high = round(prev['high'], 2)
-        prev_low = round(prev['low'], 2)
-        curr_high = round(curr['high'], 2)
-        curr_low = round(curr['low'], 2)
+        prev_high = round(prev_h, 2)
+        prev_low = round(prev_l, 2)
+        curr_high = round(curr_h, 2)
+        curr_low = round(curr_l, 2)
         
         available_indicators.append("Market Structure")
     else:
         skipped_indicators.append("Market Structure (need 10+ min)")
 
     # ================== 4. EMA CROSSOVER (needs 50+ candles = 250 min) ==================
-    if len(df_5m) >= 50:
-        df_5m['ema_20'] = df_5m['close'].ewm(span=20, adjust=False).mean()
-        df_5m['ema_50'] = df_5m['close'].ewm(span=50, adjust=False).mean()
-
-        ema_20 = round(df_5m['ema_20'].iloc[-1], 2)
-        ema_50 = round(df_5m['ema_50'].iloc[-1], 2)
+    if n_5m >= 50:
+        close_5m = candles_5m['close']
+        ema_20 = round(calculate_ema(close_5m, 20)[-1], 2)
+        ema_50 = round(calculate_ema(close_5m, 50)[-1], 2)
         ema_signal = "EMA20_ABOVE_EMA50" if ema_20 > ema_50 else "EMA20_BELOW_EMA50"
         
         available_indicators.append("EMA Crossover")
     else:
         ema_20 = ema_50 = 0.0
         ema_signal = "INSUFFICIENT_DATA"
-        skipped_indicators.append(f"EMA (need 250+ min, have {len(df_5m)*5} min)")
+        skipped_indicators.append(f"EMA (need 250+ min, have {n_5m*5} min)")
 
     # ================== 5. RSI (needs 15+ candles = 75 min) ==================
-    if len(df_5m) >= 15:
-        delta = df_5m['close'].diff()
-        gain = delta.clip(lower=0)
-        loss = -delta.clip(upper=0)
-
-        avg_gain = gain.rolling(14).mean()
-        avg_loss = loss.rolling(14).mean()
+    if n_5m >= 15:
+        rsi = wilder_rsi(candles_5m['close'], 14)
 
         # Check if we have valid RSI data
-        if not avg_gain.empty and not avg_loss.empty and not pd.isna(avg_gain.iloc[-1]):
-            if avg_loss.iloc[-1] == 0 or pd.isna(avg_loss.iloc[-1]):
-                rsi = 100.0
-            else:
-                rs = avg_gain.iloc[-1] / avg_loss.iloc[-1]
-                rsi = 100 - (100 / (1 + rs))
-
+        if not np.isnan(rsi):
             if 55 <= rsi <= 70:
                 rsi_signal = "RSI_BULLISH_ZONE"
             elif rsi > 70:
@@ -244,37 +373,31 @@ def calculate_intraday_indicators(raw_data):
     else:
         rsi = None
         rsi_signal = "INSUFFICIENT_DATA"
-        skipped_indicators.append(f"RSI (need 75+ min, have {len(df_5m)*5} min)")
+        skipped_indicators.append(f"RSI (need 75+ min, have {n_5m*5} min)")
 
     # ================== BULLISH SCORE (based on available indicators) ==================
-    bullish_checks = []
-    max_possible_score = 0
-    
-    # Volume & Value (always available)
-    bullish_checks.append(volume_value_signal == "HIGH_VOLUME_HIGH_VALUE")
-    max_possible_score += 1
-    
-    # VWAP (always available)
-    bullish_checks.append(vwap_signal == "PRICE_ABOVE_VWAP")
-    max_possible_score += 1
+    # Volume & Value and VWAP are always available
+    bullish_score = (
+        int(volume_value_signal == "HIGH_VOLUME_HIGH_VALUE")
+        + int(vwap_signal == "PRICE_ABOVE_VWAP")
+    )
+    max_possible_score = 2
     
     # Market Structure (if available)
     if market_structure:
-        bullish_checks.append(market_structure == "BULLISH_HH_HL")
+        bullish_score += market_structure == "BULLISH_HH_HL"
         max_possible_score += 1
     
     # EMA (if available)
     if ema_20 and ema_50 and ema_signal != "INSUFFICIENT_DATA":
-        bullish_checks.append(ema_20 > ema_50)
+        bullish_score += bool(ema_20 > ema_50)
         max_possible_score += 1
     
     # RSI (if available)
     if rsi is not None and rsi_signal != "INSUFFICIENT_DATA":
-        bullish_checks.append(55 <= rsi <= 70)
+        bullish_score += bool(55 <= rsi <= 70)
         max_possible_score += 1
     
-    bullish_score = sum(bullish_checks)
-    
     # Determine overall signal (adjusted for available indicators)
     if max_possible_score == 0:
         overall_signal = "INSUFFICIENT_DATA"
@@ -295,35 +418,35 @@ def calculate_intraday_indicators(raw_data):
             overall_signal = "BEARISH"
             recommendation = f"AVOID - Weak signals ({bullish_score}/{max_possible_score} indicators bullish)"
     
-    # Get timestamp
-    if len(df_5m) > 0:
-        timestamp = df_5m.index[-1].tz_localize("UTC").astimezone(ZoneInfo("Asia/Kolkata")).isoformat()
+    # Get timestamp (only this one value is ever turned into a datetime)
+    if n_5m > 0:
+        timestamp = ns_to_ist_iso(candles_5m['timestamp'][-1].astype(np.int64))
     else:
-        timestamp = latest['timestamp'].tz_localize("UTC").astimezone(ZoneInfo("Asia/Kolkata")).isoformat()
+        timestamp = ns_to_ist_iso(ts_ns[-1])
     
     # ================== RETURN RESULTS ==================
     return to_raw_numbers({
         "timestamp": timestamp,
-        "ltp": round(latest['ltp'], 2),
+        "ltp": round(last_ltp, 2),
         
         # Volume & Value
-        "volume": int(latest['volume']),
+        "volume": int(last_volume),
         "avg_volume": round(avg_volume, 2),
-        "trade_value": round(latest['trade_value'], 2),
+        "trade_value": round(last_value, 2),
         "avg_trade_value": round(avg_value, 2),
         "volume_value_signal": volume_value_signal,
         
         # VWAP
         "vwap": round(vwap, 2),
         "vwap_signal": vwap_signal,
-        "ltp_vs_vwap": round(((latest['ltp'] - vwap) / vwap) * 100, 2),
+        "ltp_vs_vwap": round(((last_ltp - vwap) / vwap) * 100, 2),
         
         # Market Structure (optional)
         "market_structure": market_structure if market_structure else "N/A",
         "prev_high": prev_high if prev_high else 0.0,
-        "curr_high": curr_high if curr_high else round(latest['high'], 2),
+        "curr_high": curr_high if curr_high else round(cols['high'][-1], 2),
         "prev_low": prev_low if prev_low else 0.0,
-        "curr_low": curr_low if curr_low else round(latest['low'], 2),
+        "curr_low": curr_low if curr_low else round(cols['low'][-1], 2),
         
         # EMA (optional)
         "ema_20": ema_20 if ema_20 else 0.0,
@@ -341,8 +464,8 @@ def calculate_intraday_indicators(raw_data):
         "recommendation": recommendation,
         
         # Info
-        "data_rows": len(df),
-        "candles_5m": len(df_5m),
+        "data_rows": len(ts_ns),
+        "candles_5m": n_5m,
         "available_indicators": available_indicators,
         "skipped_indicators": skipped_indicators,
     })
@@ -352,23 +475,45 @@ def calculate_intraday_indicators(raw_data):
 #                    DATABASE & DATA FETCHING
 # ═══════════════════════════════════════════════════════════════════════
 
+# Read-side PRAGMAs: map the DB file into memory, keep a 64 MB page cache
+# and refuse writes (the analyzer only ever reads what ws_client stores)
+READ_PRAGMAS = (
+    "mmap_size=268435456", "cache_size=-65536", "temp_store=MEMORY", "query_only=ON",
+)
+
+_connections = {}
+
+
+def get_connection(db_path="market_data.db"):
+    """Shared read connection per database file, opened once per process"""
+    conn = _connections.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        for pragma in READ_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma};")
+        _connections[db_path] = conn
+    return conn
+
+
+LIVE_DATA_COLUMNS = [
+    "exchange_timestamp", "ltp", "last_traded_qty", "volume",
+    "open", "high", "low", "close", "received_at",
+]
+
+
 def fetch_today_live_data(token, db_path="market_data.db"):
-    """Fetch all data from today's market session (09:15 AM till now)"""
-    conn = sqlite3.connect(db_path)
+    """
+    Fetch all data from today's market session (09:15 AM till now)
+    Returns {column: 1-D float64 array} for LIVE_DATA_COLUMNS
+    """
+    conn = get_connection(db_path)
     
     session_start_ms = get_today_session_start()
     current_ms = get_current_timestamp()
     
-    query = """
-        SELECT 
-            token, exchange_type, subscription_mode,
-            sequence_number, exchange_timestamp, exchange_timestamp_human,
-            ltp, last_traded_qty, avg_traded_price, volume,
-            total_buy_qty, total_sell_qty,
-            open, high, low, close,
-            last_traded_time, open_interest, oi_change_percent,
-            upper_circuit, lower_circuit, week_52_high, week_52_low,
-            received_at
+    # Only the columns the indicators and the report actually read
+    query = f"""
+        SELECT {", ".join(LIVE_DATA_COLUMNS)}
         FROM market_ticks
         WHERE token = ? 
         AND received_at >= ?
@@ -376,20 +521,102 @@ def fetch_today_live_data(token, db_path="market_data.db"):
         ORDER BY received_at ASC
     """
     
-    df = pd.read_sql_query(query, conn, params=(token, session_start_ms, current_ms))
-    conn.close()
+    rows = conn.execute(query, (token, session_start_ms, current_ms)).fetchall()
+    return live_data_columns(rows)
+
+
+def live_data_columns(rows):
+    """Column-wise float64 arrays (NULL -> NaN), no DataFrame in between"""
+    table = np.array(rows, dtype=np.float64).reshape(-1, len(LIVE_DATA_COLUMNS))
+    return dict(zip(LIVE_DATA_COLUMNS, table.T.copy()))
+
+
+def fetch_today_live_data_many(tokens, db_path="market_data.db"):
+    """
+    Today's session for several tokens in one query
+    Returns {token: fetch_today_live_data(token)-style columns}
+    """
+    tokens = list(tokens)
+    if not tokens:
+        return {}
+    
+    # One statement, one index seek per token; rows come back grouped by token
+    query = f"""
+        SELECT token, {", ".join(LIVE_DATA_COLUMNS)}
+        FROM market_ticks
+        WHERE token IN ({", ".join("?" * len(tokens))})
+        AND received_at >= ?
+        AND received_at <= ?
+        ORDER BY token, received_at ASC
+    """
+    params = (*tokens, get_today_session_start(), get_current_timestamp())
+    rows = get_connection(db_path).execute(query, params).fetchall()
     
-    return df
+    data = {token: [] for token in tokens}
+    for token, group in groupby(rows, key=itemgetter(0)):
+        data[token] = [row[1:] for row in group]
+    return {token: live_data_columns(rows) for token, rows in data.items()}
+
+
+def fetch_session_signature(token, db_path="market_data.db"):
+    """(latest received_at, tick count) for a token in today's session"""
+    row = get_connection(db_path).execute("""
+        SELECT MAX(received_at), COUNT(*)
+        FROM market_ticks
+        WHERE token = ?
+        AND received_at >= ?
+        AND received_at <= ?
+    """, (token, get_today_session_start(), get_current_timestamp())).fetchone()
+    
+    return tuple(row)
+
+
+def fetch_session_signatures(tokens, db_path="market_data.db"):
+    """fetch_session_signature for several tokens in one grouped query"""
+    tokens = list(tokens)
+    if not tokens:
+        return {}
+    
+    rows = get_connection(db_path).execute(f"""
+        SELECT token, MAX(received_at), COUNT(*)
+        FROM market_ticks
+        WHERE token IN ({", ".join("?" * len(tokens))})
+        AND received_at >= ?
+        AND received_at <= ?
+        GROUP BY token
+    """, (*tokens, get_today_session_start(), get_current_timestamp())).fetchall()
+    
+    signatures = dict.fromkeys(tokens, (None, 0))
+    signatures.update((token, (latest, count)) for token, latest, count in rows)
+    return signatures
 
 
 # ═══════════════════════════════════════════════════════════════════════
 #                       LIVE TREND ANALYSIS
 # ═══════════════════════════════════════════════════════════════════════
 
-def analyze_live_trend(token, db_path="market_data.db"):
+# (db_path, token) -> ((session_start_ms, last_received_at, data_points),
+#                      data_points, first_received_at, last_received_at, result)
+# kept in least-recently-used order and capped at MAX_CACHED_ANALYSES
+MAX_CACHED_ANALYSES = 2048
+_analysis_cache = OrderedDict()
+
+
+def get_cached_analysis(db_path, token, signature):
+    """Cached entry for (db_path, token) if its signature still matches"""
+    cached = _analysis_cache.get((db_path, token))
+    if cached is None or cached[0] != signature:
+        return None
+    _analysis_cache.move_to_end((db_path, token))
+    return cached
+
+
+def analyze_live_trend(token, db_path="market_data.db", raw_data=None, signature=None):
     """
     Analyze current live market trend for a token
     Shows all 5 indicators and gives BUY/AVOID decision
+    `raw_data` / `signature` let callers pass today's ticks or their
+    (latest received_at, count) when they already fetched them
     """
     now = datetime.now()
     current_time_str = now.strftime('%H:%M:%S')
@@ -412,30 +639,60 @@ def analyze_live_trend(token, db_path="market_data.db"):
     
     print(f"{'='*70}\n")
     
-    # Fetch today's data
+    # Fetch today's data (reuse the last analysis if no new tick arrived)
     print("📡 Fetching today's market data...")
-    raw_data = fetch_today_live_data(token, db_path)
+    if signature is None:
+        if raw_data is not None:
+            if len(raw_data['received_at']):
+                signature = (int(raw_data['received_at'][-1]), len(raw_data['received_at']))
+            else:
+                signature = (None, 0)
+        elif (db_path, token) in _analysis_cache:
+            # Only worth a probe query when there is an earlier analysis to reuse
+            signature = fetch_session_signature(token, db_path)
+    session_start_ms = get_today_session_start()
+    cached = None
+    if signature is not None:
+        cached = get_cached_analysis(db_path, token, (session_start_ms, *signature))
     
-    if raw_data.empty:
-        print(f"\n❌ No data available for token {token} in today's session!")
-        print(f"   • Make sure ws_client.py is running")
-        print(f"   • Check if market has opened (09:15 AM)")
-        print(f"   • Verify token number is correct\n")
-        return None
+    if cached is not None:
+        _, data_points, first_received_at, last_received_at, result = cached
+    else:
+        if raw_data is None:
+            raw_data = fetch_today_live_data(token, db_path)
+        received_at = raw_data['received_at']
+        
+        if len(received_at) == 0:
+            print(f"\n❌ No data available for token {token} in today's session!")
+            print(f"   • Make sure ws_client.py is running")
+            print(f"   • Check if market has opened (09:15 AM)")
+            print(f"   • Verify token number is correct\n")
+            return None
+        
+        data_points = len(received_at)
+        first_received_at = int(received_at[0])
+        last_received_at = int(received_at[-1])
+        result = calculate_intraday_indicators(raw_data)
+        _analysis_cache[(db_path, token)] = (
+            (session_start_ms, last_received_at, data_points),
+            data_points, first_received_at, last_received_at, result,
+        )
+        _analysis_cache.move_to_end((db_path, token))
+        if len(_analysis_cache) > MAX_CACHED_ANALYSES:
+            _analysis_cache.popitem(last=False)
     
     # Data info
-    data_start = datetime.fromtimestamp(raw_data['received_at'].iloc[0] / 1000)
-    data_end = datetime.fromtimestamp(raw_data['received_at'].iloc[-1] / 1000)
+    data_start = datetime.fromtimestamp(first_received_at / 1000)
+    data_end = datetime.fromtimestamp(last_received_at / 1000)
     duration_minutes = (data_end - data_start).total_seconds() / 60
     
-    print(f"✓ Found {len(raw_data)} data points")
+    print(f"✓ Found {data_points} data points")
     print(f"✓ Session started: {data_start.strftime('%H:%M:%S')}")
     print(f"✓ Latest data: {data_end.strftime('%H:%M:%S')}")
     print(f"✓ Duration: {duration_minutes:.0f} minutes\n")
     
     # Calculate indicators
     print("🔄 Calculating technical indicators...\n")
-    result = calculate_intraday_indicators(raw_data.to_dict('records'))
     
     if "error" in result:
         print(f"❌ Analysis Error: {result['error']}")
@@ -603,20 +860,34 @@ def scan_all_tokens_live(db_path="market_data.db"):
     print("="*70 + "\n")
     
     # Get all tokens
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    cursor = get_connection(db_path).cursor()
     cursor.execute("SELECT DISTINCT token FROM market_ticks")
     tokens = [row[0] for row in cursor.fetchall()]
-    conn.close()
     
     print(f"📊 Scanning {len(tokens)} tokens...\n")
     
+    # Tokens analyzed earlier in this process get one grouped query to see
+    # whether new ticks arrived; every other token is stale by definition.
+    # Stale tokens are re-read in a single query and re-analyzed.
+    session_start_ms = get_today_session_start()
+    signatures = fetch_session_signatures(
+        [token for token in tokens if (db_path, token) in _analysis_cache], db_path
+    )
+    stale = [
+        token for token in tokens
+        if token not in signatures
+        or get_cached_analysis(db_path, token, (session_start_ms, *signatures[token])) is None
+    ]
+    live_data = fetch_today_live_data_many(stale, db_path)
+    
     results = []
     
     for token in tokens:
         try:
             print(f"Analyzing {token}...", end=" ")
-            result = analyze_live_trend(token, db_path)
+            result = analyze_live_trend(
+                token, db_path, live_data.get(token), signatures.get(token)
+            )
             
             if result and "error" not in result:
                 results.append({
@@ -710,8 +981,7 @@ def interactive_mode():
         print(f"\n💡 You can still analyze latest available data")
     
     # Get tokens from today
-    conn = sqlite3.connect("market_data.db")
-    cursor = conn.cursor()
+    cursor = get_connection().cursor()
     cursor.execute("""
         SELECT token, COUNT(*) as ticks
         FROM market_ticks 
@@ -721,7 +991,6 @@ def interactive_mode():
     """, (get_today_session_start(),))
     
     tokens_data = cursor.fetchall()
-    conn.close()
     
     if not tokens_data:
         print("\n❌ No data from today's session!")
@@ -1,141 +1,126 @@
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 import json
 import struct
 from typing import Dict, Any, List
 
 
-# ================= Binary Reader =================
-class BinaryReader:
-    __slots__ = ("data", "offset")
-
-    def __init__(self, data: bytes):
-        self.data = data
-        self.offset = 0
-
-    def read(self, fmt: str):
-        value = struct.unpack_from(fmt, self.data, self.offset)[0]
-        self.offset += struct.calcsize(fmt)
-        return value
-
-    def skip(self, size: int):
-        self.offset += size
-
-    def read_int8(self):
-        return self.read("<b")
-
-    def read_int16(self):
-        return self.read("<h")
-
-    def read_int32(self):
-        return self.read("<i")
-
-    def read_int64(self):
-        return self.read("<q")
-
-    def read_double(self):
-        return self.read("<d")
-
-    def read_string(self, length: int):
-        raw = self.data[self.offset:self.offset + length]
-        self.offset += length
-        return raw.split(b"\x00", 1)[0].decode("utf-8")
+# The same few subscribed tokens repeat on every tick: decode each one once
+@lru_cache(maxsize=4096)
+def decode_token(raw: bytes) -> str:
+    return raw.partition(b"\x00")[0].decode("utf-8")
 
 
 # ================= Price Normalizer =================
-def normalize_price(value: int, exchange_type: int) -> float:
-    if value is None:
-        return None
+def price_divisor(exchange_type: int) -> int:
     # Currency (CDE)
     if exchange_type == 13:
-        return value / 10_000_000
+        return 10_000_000
     # All others
-    return value / 100
+    return 100
+
 
 IST = timezone(timedelta(hours=5, minutes=30))
 
+# Formatting the date/time dominates per-tick parsing; ticks from all tokens
+# share the same few seconds, so format each second once and add the millis
+@lru_cache(maxsize=1024)
+def _ist_second(seconds: int) -> str:
+    return datetime.fromtimestamp(seconds, tz=IST).strftime("%Y-%m-%d %H:%M:%S")
+
+
 def ms_to_ist(ms: int) -> str:
-    return datetime.fromtimestamp(ms / 1000, tz=IST).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+    seconds, millis = divmod(ms, 1000)
+    return f"{_ist_second(seconds)}.{millis:03d}"
 
 # ================= Best Five =================
-def parse_best_five(reader: BinaryReader, exchange_type: int) -> List[Dict[str, Any]]:
-    result = []
-
-    for _ in range(10):
-        side_flag = reader.read_int16()
-        qty = reader.read_int64()
-        raw_price = reader.read_int64()
-        orders = reader.read_int16()
+def parse_best_five(fields: tuple, divisor: int) -> List[Dict[str, Any]]:
+    # 10 rows of (side, quantity, price, orders), flattened
+    rows = iter(fields)
 
-        result.append({
+    return [
+        {
             "side": "buy" if side_flag == 1 else "sell",
             "quantity": qty,
-            "price": normalize_price(raw_price, exchange_type),
+            "price": raw_price / divisor,
             "orders": orders
-        })
-
-    return result
+        }
+        for side_flag, qty, raw_price, orders in zip(rows, rows, rows, rows)
+    ]
 
 
 # ================= Main Parser =================
-def parse_market_data(binary_data: bytes) -> Dict[str, Any]:
-    r = BinaryReader(binary_data)
-    out: Dict[str, Any] = {}
-
-    # ---- Header ----
-    out["subscription_mode"] = r.read_int8()
-    out["exchange_type"] = r.read_int8()
-    out["token"] = r.read_string(25)
-    out["sequence_number"] = r.read_int64()
-    raw_ts = r.read_int64()
-    out["exchange_timestamp"] = raw_ts
-    out["exchange_timestamp_human"] = ms_to_ist(raw_ts)
-
-    # ---- LTP ----
-    raw_ltp = r.read_int32()
-    out["ltp"] = normalize_price(raw_ltp, out["exchange_type"])
-    r.skip(4)  # padding
-
-    if out["subscription_mode"] == 1:
-        return out
-
-    # ---- Quote ----
-    out["last_traded_qty"] = r.read_int64()
-
-    raw_avg_price = r.read_int64()
-    out["avg_traded_price"] = normalize_price(raw_avg_price, out["exchange_type"])
-
-    out["volume"] = r.read_int64()
-    out["total_buy_qty"] = r.read_double()
-    out["total_sell_qty"] = r.read_double()
-
-    raw_open = r.read_int64()
-    raw_high = r.read_int64()
-    raw_low = r.read_int64()
-    raw_close = r.read_int64()
-
-    out["open"] = normalize_price(raw_open, out["exchange_type"])
-    out["high"] = normalize_price(raw_high, out["exchange_type"])
-    out["low"] = normalize_price(raw_low, out["exchange_type"])
-    out["close"] = normalize_price(raw_close, out["exchange_type"])
-
-    if out["subscription_mode"] == 2:
-        return out
-
-    # ---- Snap Quote ----
-    out["last_traded_time"] = r.read_int64()
-    out["open_interest"] = r.read_int64()
-    out["oi_change_percent"] = r.read_double()
-
-    out["best_five"] = parse_best_five(r, out["exchange_type"])
-
-    raw_upper = r.read_int64()
-    raw_lower = r.read_int64()
-    raw_52_high = r.read_int64()
-    raw_52_low = r.read_int64()
-
-    out["upper_circuit"] = normalize_price(raw_upper, out["exchange_type"])
-    out["lower_circuit"] = normalize_price(raw_lower, out["exchange_type"])
-    out["week_52_high"] = normalize_price(raw_52_high, out["exchange_type"])
-    out["week_52_low"] = normalize_price(raw_52_low, out["exchange_type"])
+# The layout is fixed per subscription mode, so each mode gets one Struct
+# covering the whole packet and a parser with no mode checks
+_HEADER = "bb25sqqi4x"  # mode, exchange, token, seq, ts, ltp (+ padding)
+_QUOTE = "qqqddqqqq"  # ltq, atp, volume, buy/sell qty, OHLC
+_SNAP_QUOTE = "qqd"  # ltt, open interest, OI change %
+_BEST_FIVE = "hqqh" * 10  # side, quantity, price, orders
+_CIRCUITS = "qqqq"  # upper, lower, 52w high, 52w low
+
+_LTP_PACKET = struct.Struct("<" + _HEADER)
+_QUOTE_PACKET = struct.Struct("<" + _HEADER + _QUOTE)
+_SNAP_QUOTE_PACKET = struct.Struct("<" + _HEADER + _QUOTE + _SNAP_QUOTE + _BEST_FIVE + _CIRCUITS)
+
+
+def _header_fields(v: tuple, divisor: int) -> Dict[str, Any]:
+    raw_ts = v[4]
+    return {
+        "subscription_mode": v[0],
+        "exchange_type": v[1],
+        "token": decode_token(v[2]),
+        "sequence_number": v[3],
+        "exchange_timestamp": raw_ts,
+        "exchange_timestamp_human": ms_to_ist(raw_ts),
+        "ltp": v[5] / divisor,
+    }
+
+
+def _add_quote_fields(out: Dict[str, Any], v: tuple, divisor: int) -> None:
+    out["last_traded_qty"] = v[6]
+    out["avg_traded_price"] = v[7] / divisor
+    out["volume"] = v[8]
+    out["total_buy_qty"] = v[9]
+    out["total_sell_qty"] = v[10]
+    out["open"] = v[11] / divisor
+    out["high"] = v[12] / divisor
+    out["low"] = v[13] / divisor
+    out["close"] = v[14] / divisor
+
+
+def _parse_ltp(binary_data: bytes) -> Dict[str, Any]:
+    v = _LTP_PACKET.unpack_from(binary_data)
+    return _header_fields(v, price_divisor(v[1]))
+
+
+def _parse_quote(binary_data: bytes) -> Dict[str, Any]:
+    v = _QUOTE_PACKET.unpack_from(binary_data)
+    divisor = price_divisor(v[1])
+    out = _header_fields(v, divisor)
+    _add_quote_fields(out, v, divisor)
+    return out
+
 
+def _parse_snap_quote(binary_data: bytes) -> Dict[str, Any]:
+    v = _SNAP_QUOTE_PACKET.unpack_from(binary_data)
+    divisor = price_divisor(v[1])
+    out = _header_fields(v, divisor)
+    _add_quote_fields(out, v, divisor)
+
+    out["last_traded_time"] = v[15]
+    out["open_interest"] = v[16]
+    out["oi_change_percent"] = v[17]
+    out["best_five"] = parse_best_five(v[18:58], divisor)
+    out["upper_circuit"] = v[58] / divisor
+    out["lower_circuit"] = v[59] / divisor
+    out["week_52_high"] = v[60] / divisor
+    out["week_52_low"] = v[61] / divisor
     return out
+
+
+# Anything other than LTP (1) / QUOTE (2) is parsed as a full SNAPQUOTE
+_PARSERS = {1: _parse_ltp, 2: _parse_quote}
+
+
+def parse_market_data(binary_data: bytes) -> Dict[str, Any]:
+    return _PARSERS.get(binary_data[0], _parse_snap_quote)(binary_data)
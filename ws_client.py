@@ -1,7 +1,7 @@
 import websocket
 import json
 import time
-from db_writer import insert_market_tick
+from db_writer import flush_ticks, insert_market_tick
 from parse_response import parse_market_data
 
 # ================= CONFIG =================
@@ -17,31 +17,34 @@ MAX_RECONNECT_ATTEMPTS = 5
 RECONNECT_DELAY = 5  # Initial delay in seconds
 reconnect_count = 0
 
+# Subscription request (edit the tokens to stream here)
+SUBSCRIBE_PAYLOAD = {
+    "action": 1,
+    "params": {
+        "mode": SUBSCRIBE_MODE,
+        "tokenList": [
+            {
+                "exchangeType": 1,          # NSE_CM
+                "tokens": [
+                    "17939",
+                    "17851",
+                    "17971",
+                    "18035",
+                    "17801"
+                ]
+            }
+        ]
+    }
+}
+# Encoded once: the request is identical on every (re)connect
+SUBSCRIBE_FRAME = json.dumps(SUBSCRIBE_PAYLOAD)
+
 def on_open(ws):
     global reconnect_count
     reconnect_count = 0  # Reset reconnection counter on successful connection
     print("WebSocket connected successfully!")
 
-    payload = {
-        "action": 1,
-        "params": {
-            "mode": SUBSCRIBE_MODE,
-            "tokenList": [
-                {
-                    "exchangeType": 1,          # NSE_CM
-                    "tokens": [
-                        "17939",
-                        "17851",
-                        "17971",
-                        "18035",
-                        "17801"
-                    ]
-                }
-            ]
-        }
-    }
-
-    ws.send(json.dumps(payload))
+    ws.send(SUBSCRIBE_FRAME)
     print(f"Subscribed to tokens in mode {SUBSCRIBE_MODE}")
 
 
@@ -67,17 +70,9 @@ def on_error(ws, error):
 
 
 def on_close(ws, close_status_code, close_msg):
-    global reconnect_count
+    flush_ticks()
     print(f"WebSocket closed - Status: {close_status_code}, Message: {close_msg}")
-    
-    if reconnect_count < MAX_RECONNECT_ATTEMPTS:
-        reconnect_count += 1
-        delay = RECONNECT_DELAY * (2 ** (reconnect_count - 1))  # Exponential backoff
-        print(f"Reconnecting in {delay} seconds... (Attempt {reconnect_count}/{MAX_RECONNECT_ATTEMPTS})")
-        time.sleep(delay)
-        start()
-    else:
-        print("Max reconnection attempts reached. Exiting.")
+    # run_forever() returns after this; run() decides whether to reconnect
 
 
 def start():
@@ -107,5 +102,21 @@ def start():
     )
 
 
+def run():
+    """Keep the feed connected, reconnecting with exponential backoff"""
+    global reconnect_count
+    while True:
+        start()
+
+        if reconnect_count >= MAX_RECONNECT_ATTEMPTS:
+            print("Max reconnection attempts reached. Exiting.")
+            break
+
+        reconnect_count += 1
+        delay = RECONNECT_DELAY * (2 ** (reconnect_count - 1))  # Exponential backoff
+        print(f"Reconnecting in {delay} seconds... (Attempt {reconnect_count}/{MAX_RECONNECT_ATTEMPTS})")
+        time.sleep(delay)
+
+
 if __name__ == "__main__":
-    start()
+    run()